@@ -1,17 +1,33 @@
-from typing import List, Dict
+from typing import List, Dict, Set
 import os
 import random
 from utils import (
     ensure_data_dirs_exist,
     load_metadata,
     IMAGES_DIR,
+    KIOSK_ID,
     append_user_data,
+    append_score_log,
+    new_entry_id,
+    seed_score_log,
     load_all_user_data,
+    read_global_user_data,
+    global_user_data_size,
 )
+from ranking import ScoreIndex, TopScores, MAX_GAME_SCORE
 
 
 _session_total_score = 0
 _player_name = ""
+# Per-difficulty rank indexes and top scores, built from userdata.json and
+# the merged global log at startup, then kept up to date incrementally
+_score_indexes: Dict[str, ScoreIndex] = {}
+_top_scores: Dict[str, TopScores] = {}
+_score_indexes_loaded = False
+# Ids of this kiosk's games; the global log holds them too once synced
+_local_ids: Set[str] = set()
+# Bytes of the global log already added to the indexes
+_global_offset = 0
 
 
 def update_total_score(score: int) -> None:
@@ -20,23 +36,123 @@ def update_total_score(score: int) -> None:
 
 
 def save_final_score(total_score: int, difficulty: str) -> None:
-    # Append final score to leaderboard data
-    append_user_data({
+    # Append final score to leaderboard data and to the kiosk sync log
+    entry = {
+        "id": new_entry_id(),
+        "kiosk": KIOSK_ID,
         "player": _player_name or "Player",
         "score": int(total_score),
         "difficulty": difficulty,
-    })
-
-
-def get_rankings(difficulty: str) -> List[Dict]:
-    # Load all entries, filter by difficulty, sort by score desc
+    }
+    append_user_data(entry)
+    try:
+        append_score_log(entry)
+    except OSError as e:
+        # The game is still in userdata.json but won't reach other kiosks
+        print(f"Failed to write score to sync log: {e}")
+    # Keep the rank index in step with the file once it has been built
+    if _score_indexes_loaded:
+        _local_ids.add(entry["id"])
+        _add_to_leaderboard(entry)
+
+
+def prepare_leaderboard() -> None:
+    # Called once when the app starts
+    try:
+        seed_score_log()
+    except (OSError, ValueError) as e:
+        print(f"Failed to seed sync log from userdata.json: {e}")
+    load_score_indexes()
+
+
+def load_score_indexes() -> None:
+    # Build the per-difficulty rank indexes from the local and merged scores
+    global _score_indexes_loaded, _global_offset
+    _score_indexes.clear()
+    _top_scores.clear()
+    _local_ids.clear()
     try:
         entries = load_all_user_data()
-        filtered = [e for e in entries if e.get("difficulty") == difficulty]
-        filtered.sort(key=lambda e: int(e.get("score", 0)), reverse=True)
-        return filtered
     except Exception:
-        return []
+        entries = []
+    _local_ids.update(e["id"] for e in entries if e.get("id"))
+    try:
+        global_entries, _global_offset = read_global_user_data(0)
+    except OSError:
+        global_entries, _global_offset = [], 0
+    entries = entries + [e for e in global_entries if e.get("id") not in _local_ids]
+
+    max_scores: Dict[str, int] = {}
+    for e in entries:
+        try:
+            score = int(e.get("score", 0))
+        except (TypeError, ValueError):
+            continue
+        difficulty = e.get("difficulty")
+        max_scores[difficulty] = max(max_scores.get(difficulty, 0), score)
+    for difficulty, max_score in max_scores.items():
+        # Older entries can be above the current 5 round maximum
+        _score_indexes[difficulty] = ScoreIndex(max(MAX_GAME_SCORE, max_score))
+    for e in entries:
+        _add_to_leaderboard(e)
+    _score_indexes_loaded = True
+
+
+def _add_to_leaderboard(entry: Dict) -> None:
+    try:
+        score = int(entry.get("score", 0))
+    except (TypeError, ValueError):
+        return
+    difficulty = entry.get("difficulty")
+    _get_score_index(difficulty).add(score)
+    top = _top_scores.get(difficulty)
+    if top is None:
+        top = TopScores()
+        _top_scores[difficulty] = top
+    top.add(entry)
+
+
+def _refresh_leaderboard() -> None:
+    # Add games merged by src/sync.py since the last call
+    global _global_offset
+    if not _score_indexes_loaded:
+        load_score_indexes()
+        return
+    size = global_user_data_size()
+    if size == _global_offset:
+        return
+    if size < _global_offset:
+        # Global log was replaced; start over
+        load_score_indexes()
+        return
+    try:
+        new_entries, _global_offset = read_global_user_data(_global_offset)
+    except OSError:
+        return
+    for e in new_entries:
+        if e.get("id") not in _local_ids:
+            _add_to_leaderboard(e)
+
+
+def _get_score_index(difficulty: str) -> ScoreIndex:
+    index = _score_indexes.get(difficulty)
+    if index is None:
+        index = ScoreIndex()
+        _score_indexes[difficulty] = index
+    return index
+
+
+def get_placement(score: int, difficulty: str) -> Dict:
+    # Rank of a score among all saved games of this difficulty
+    _refresh_leaderboard()
+    return _get_score_index(difficulty).placement(score)
+
+
+def get_rankings(difficulty: str) -> List[Dict]:
+    # Best scores for this difficulty, highest first
+    _refresh_leaderboard()
+    top = _top_scores.get(difficulty)
+    return top.entries() if top else []
 
 
 
@@ -8,7 +8,8 @@ Summary
     selection, showing the current photo, the clickable map widget, the timer
     and score display, and end-of-game summary.
 - PhotoLabel: QLabel subclass that scales QPixmap while preserving aspect
-    ratio and quality.
+    ratio and quality. Photos are decoded at display size (see
+    `src/image_loader.py`).
 
 Data expectations
 - The game relies on `initialize_game_state` and `get_processed_image_path`
@@ -26,6 +27,8 @@ Running
 
 """
 
+import math
+
 from PySide6.QtWidgets import (
     QMainWindow,
     QWidget,
@@ -35,12 +38,14 @@ from PySide6.QtWidgets import (
     QLabel,
     QSizePolicy,
 )
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QAction, QKeySequence, QPixmap
+from PySide6.QtCore import Qt, QTimer, QSize
+from PySide6.QtGui import QAction, QKeySequence
 
 from clickable_map import ClickableMap
+from image_loader import image_size, decode_scaled
 from score import get_scores
-from game import save_final_score,get_rankings,initialize_game_state,get_processed_image_path
+from game import save_final_score,get_rankings,get_placement,prepare_leaderboard,initialize_game_state,get_processed_image_path
+from ranking import format_placement
 
 
 
@@ -48,14 +53,49 @@ class PhotoLabel(QLabel):
     """
     Custom QLabel that automatically scales images while maintaining aspect ratio.
     Handles image resizing when the widget is resized.
+
+    Photos shown with `setImagePath` are decoded at the size the label needs
+    (including the device pixel ratio) plus some headroom, so the decoded
+    original is never much larger than what is on screen. When the label
+    grows past it, the photo is decoded again once resizing has settled.
     """
+    # Decode this much larger than needed so small resizes reuse the original
+    DECODE_HEADROOM = 1.25
+    # Resizes closer together than this only trigger one new decode
+    DECODE_DELAY_MS = 150
+
     def __init__(self, text=""):
         super().__init__(text)
         self.original_pixmap = None
+        self.image_path = None
+        self.image_source_size = QSize()
         self.setMinimumSize(200, 150)  # Set minimum size to prevent too small images
+        self._decode_timer = QTimer(self)
+        self._decode_timer.setSingleShot(True)
+        self._decode_timer.timeout.connect(self._decode_and_update)
+
+    def setImagePath(self, path):
+        """Show the photo at `path`, decoded for the label size. Returns False if it can't be read"""
+        self._decode_timer.stop()
+        self.original_pixmap = None
+        self.image_path = None
+        source_size = image_size(path)
+        if not source_size.isValid():
+            return False
+        self.image_path = path
+        self.image_source_size = source_size
+        if self.isVisible():
+            # Label is already laid out (every round after the first)
+            self._decode_and_update()
+            return self.original_pixmap is not None
+        # Wait until the layout has given the label its real size
+        self._decode_timer.start(0)
+        return True
 
     def setPixmap(self, pixmap):
         """Store original pixmap and display scaled version"""
+        self._decode_timer.stop()
+        self.image_path = None
         if pixmap and not pixmap.isNull():
             self.original_pixmap = pixmap
             self._update_scaled_pixmap()
@@ -63,20 +103,56 @@ class PhotoLabel(QLabel):
             self.original_pixmap = None
             super().setPixmap(pixmap)
 
+    def _target_size(self):
+        # Size of the label in device pixels
+        ratio = self.devicePixelRatioF()
+        widget_size = self.size()
+        return QSize(
+            math.ceil(widget_size.width() * ratio),
+            math.ceil(widget_size.height() * ratio),
+        )
+
+    def _needs_decode(self):
+        if not self.image_path:
+            return False
+        if not self.original_pixmap:
+            return True
+        # Re-decode only if the label now needs more pixels than were decoded
+        needed = self.image_source_size.scaled(self._target_size(), Qt.KeepAspectRatio)
+        needed = needed.boundedTo(self.image_source_size)
+        decoded = self.original_pixmap.size()
+        return needed.width() > decoded.width() or needed.height() > decoded.height()
+
+    def _decode_and_update(self):
+        if not self.image_path:
+            return
+        decode_size = self._target_size() * self.DECODE_HEADROOM
+        pixmap = decode_scaled(self.image_path, decode_size, self.image_source_size)
+        if pixmap.isNull():
+            self.original_pixmap = None
+            self.setText(f"Failed to load image: {self.image_path}")
+            return
+        self.original_pixmap = pixmap
+        self._update_scaled_pixmap()
+
     def _update_scaled_pixmap(self):
         """Update the displayed pixmap with proper scaling"""
         if self.original_pixmap and not self.original_pixmap.isNull():
             # Get current widget size
-            widget_size = self.size()
-            if widget_size.width() > 0 and widget_size.height() > 0:
+            target_size = self._target_size()
+            if target_size.width() > 0 and target_size.height() > 0:
                 scaled_pixmap = self.original_pixmap.scaled(
-                    widget_size, Qt.KeepAspectRatio, Qt.SmoothTransformation
+                    target_size, Qt.KeepAspectRatio, Qt.SmoothTransformation
                 )
+                scaled_pixmap.setDevicePixelRatio(self.devicePixelRatioF())
                 super().setPixmap(scaled_pixmap)
 
     def resizeEvent(self, event):
         """Handle widget resize by updating the scaled pixmap"""
         super().resizeEvent(event)
+        if self._needs_decode():
+            # Until then the current original is stretched to fit
+            self._decode_timer.start(self.DECODE_DELAY_MS if self.original_pixmap else 0)
         if self.original_pixmap:
             self._update_scaled_pixmap()
 
@@ -96,6 +172,8 @@ class MainWindow(QMainWindow):
         self.current_image_index = 0
         self.current_difficulty = None
         self.setup_menu_bar()
+        # Build the rank index now so the end screen doesn't read the leaderboard
+        prepare_leaderboard()
         self.show_difficulty_selection()
 
     def setup_menu_bar(self):
@@ -237,9 +315,7 @@ class MainWindow(QMainWindow):
         image_path = get_processed_image_path(self.current_image_data)
 
         if image_path:
-            pixmap = QPixmap(image_path)
-            if not pixmap.isNull():
-                self.photo_label.setPixmap(pixmap)
+            if self.photo_label.setImagePath(image_path):
                 print(f"Loaded image: {image_path}")
             else:
                 self.photo_label.setText(f"Failed to load image: {image_path}")
@@ -325,6 +401,13 @@ class MainWindow(QMainWindow):
         final_score_label.setStyleSheet("font-size: 18px; margin: 10px;")
         layout.addWidget(final_score_label)
 
+        if self.current_difficulty:
+            placement = get_placement(self.current_score, self.current_difficulty)
+            placement_label = QLabel(format_placement(placement))
+            placement_label.setAlignment(Qt.AlignCenter)
+            placement_label.setStyleSheet("font-size: 16px; margin: 5px;")
+            layout.addWidget(placement_label)
+
         rankings_label = QLabel("Leaderboard:")
         rankings_label.setAlignment(Qt.AlignCenter)
         rankings_label.setStyleSheet(
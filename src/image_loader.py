@@ -0,0 +1,42 @@
+"""Image_loader.py
+
+Helpers for decoding photos at the size they are displayed at.
+
+Summary
+- image_size(path): size of an image read from its header, without decoding.
+- decode_scaled(path, target): decode an image so it fits inside `target`
+    (never larger than the file itself). JPEGs are scaled during decoding,
+    so a 12 MP photo shown in a 1280x500 label costs ~3 MB instead of ~48 MB.
+
+"""
+
+from typing import Optional
+
+from PySide6.QtCore import QSize, Qt
+from PySide6.QtGui import QImageReader, QPixmap
+
+
+def image_size(path: str) -> QSize:
+    reader = QImageReader(path)
+    return reader.size()
+
+
+def decode_scaled(path: str, target: QSize, source_size: Optional[QSize] = None) -> QPixmap:
+    """
+    Decode `path` scaled to fit inside `target`, keeping the aspect ratio.
+
+    Returns:
+        The decoded pixmap, or a null QPixmap if the file can't be read.
+    """
+    reader = QImageReader(path)
+    if source_size is None:
+        source_size = reader.size()
+    if source_size.isValid() and target.width() > 0 and target.height() > 0:
+        fitted = source_size.scaled(target, Qt.KeepAspectRatio)
+        # Only ever scale down; the full-size image is the upper bound
+        if fitted.width() < source_size.width() and fitted.height() < source_size.height():
+            reader.setScaledSize(fitted)
+    image = reader.read()
+    if image.isNull():
+        return QPixmap()
+    return QPixmap.fromImage(image)
@@ -0,0 +1,135 @@
+"""Ranking.py
+
+This module provides an order-statistic index over final game scores so the
+end screen can tell a player where their game placed without sorting the
+whole leaderboard.
+
+Summary
+- ScoreIndex: a Fenwick (binary indexed) tree with one bucket per possible
+    score. Adding a score and asking for its rank are both O(log n) in the
+    score range.
+- TopScores: the best LEADERBOARD_SIZE entries, kept in memory so the
+    end-screen leaderboard doesn't need to read and sort every saved game.
+
+Scores are bounded by ROUNDS_PER_GAME * MAX_ROUND_SCORE (0-25000 for a 5 round
+game). Older entries in userdata.json can be above that bound, so the index
+is sized from the largest stored score when it is built, and grows (an O(n)
+rebuild) if a higher score is added later.
+
+"""
+
+from typing import Dict, Iterable, List
+
+
+ROUNDS_PER_GAME = 5
+MAX_ROUND_SCORE = 5000
+MAX_GAME_SCORE = ROUNDS_PER_GAME * MAX_ROUND_SCORE
+LEADERBOARD_SIZE = 5
+
+
+class ScoreIndex:
+    def __init__(self, max_score: int = MAX_GAME_SCORE):
+        self.max_score = int(max_score)
+        # tree[i] covers bucket (i - 1), index 0 is unused
+        self._tree = [0] * (self.max_score + 2)
+        self._total = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    def _bucket(self, score) -> int:
+        score = int(score)
+        if score < 0:
+            return 0
+        if score > self.max_score:
+            return self.max_score
+        return score
+
+    def _grow(self, max_score: int) -> None:
+        counts = [
+            self.count_at_most(b) - (self.count_at_most(b - 1) if b else 0)
+            for b in range(self.max_score + 1)
+        ]
+        self.max_score = max_score
+        self._tree = [0] * (max_score + 2)
+        for b, count in enumerate(counts):
+            self._tree[b + 1] = count
+        # Linear Fenwick build: push each node's total up to its parent
+        size = len(self._tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                self._tree[parent] += self._tree[i]
+
+    def add(self, score: int) -> None:
+        """Record one game with the given final score"""
+        if int(score) > self.max_score:
+            self._grow(int(score))
+        i = self._bucket(score) + 1
+        size = len(self._tree)
+        while i < size:
+            self._tree[i] += 1
+            i += i & -i
+        self._total += 1
+
+    def extend(self, scores: Iterable[int]) -> None:
+        for score in scores:
+            self.add(score)
+
+    def count_at_most(self, score: int) -> int:
+        """Number of recorded games scoring less than or equal to `score`"""
+        i = self._bucket(score) + 1
+        count = 0
+        while i > 0:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+
+    def count_above(self, score: int) -> int:
+        return self._total - self.count_at_most(score)
+
+    def rank(self, score: int) -> int:
+        """1-based rank of `score`; ties share the best rank"""
+        return self.count_above(score) + 1
+
+    def placement(self, score: int) -> Dict:
+        """
+        Describe where `score` places among the recorded games.
+
+        Returns:
+            {"rank": int, "total": int, "top_percent": float}
+            where "top_percent" is the share of games (in %) scoring at
+            least as well as rank `rank`, e.g. rank 1 of 200 -> 0.5
+        """
+        total = self._total
+        rank = self.rank(score)
+        if total == 0:
+            return {"rank": 1, "total": 0, "top_percent": 100.0}
+        top_percent = min(100.0, 100.0 * rank / total)
+        return {"rank": rank, "total": total, "top_percent": top_percent}
+
+
+class TopScores:
+    def __init__(self, size: int = LEADERBOARD_SIZE):
+        self.size = size
+        self._entries: List[dict] = []
+
+    def add(self, entry: dict) -> None:
+        """Offer an entry; ties keep the order entries were added in"""
+        score = int(entry.get("score", 0))
+        if len(self._entries) >= self.size and score <= int(self._entries[-1].get("score", 0)):
+            return
+        self._entries.append(entry)
+        # Stable sort, so an equal score added later stays below
+        self._entries.sort(key=lambda e: int(e.get("score", 0)), reverse=True)
+        del self._entries[self.size:]
+
+    def entries(self) -> List[dict]:
+        return list(self._entries)
+
+
+def format_placement(placement: Dict) -> str:
+    """Text like "Rank 3 of 120 (top 2.5%)" for the end screen"""
+    # Never show "top 0.0%" once a difficulty has more than 2000 games
+    top_percent = max(placement["top_percent"], 0.1)
+    return f"Rank {placement['rank']} of {placement['total']} (top {top_percent:.1f}%)"
@@ -0,0 +1,236 @@
+"""Soak.py
+
+Long-running memory soak test for the kiosk build.
+
+This plays thousands of scripted games through `MainWindow` on Qt's offscreen
+platform: start a game, click the map for every round, reach the end screen
+and go back to the difficulty selection, exactly as a player would. RSS and
+`tracemalloc` snapshots are taken every few games; after warm-up each sample
+lists the allocation sites that grew since the previous one, so steady growth
+can be told apart from a one-off jump, and the end of the run lists growth
+since warm-up.
+
+The run fails (exit code 1) when memory growth per game after warm-up is
+above the budget, or when the map or a photo failed to load (a soak without
+those pixmaps doesn't measure the real allocation path; pass
+--allow-missing-assets to only warn). Note that `tracemalloc` only sees Python allocations;
+pixmaps and widgets live in Qt's native heap and only show up in RSS.
+
+The game runs in a temporary working directory with its own `data/`, so the
+real leaderboard and score log are left untouched.
+
+Running
+
+        python src/soak.py --games 2000 --budget-kb 64
+
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import List, Tuple
+
+project_root = Path(__file__).parent.parent.absolute()
+src_dir = project_root / "src"
+sys.path.insert(0, str(src_dir))
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        # Not Linux: fall back to the peak, which is still useful for growth
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def prepare_workdir() -> str:
+    # Fresh data/ with the real image metadata, assets/ linked from the repo
+    workdir = tempfile.mkdtemp(prefix="nmh_soak_")
+    os.makedirs(os.path.join(workdir, "data"))
+    shutil.copy(project_root / "data" / "imagedata.json", os.path.join(workdir, "data"))
+    os.symlink(project_root / "assets", os.path.join(workdir, "assets"))
+    return workdir
+
+
+def check_pixmaps(window) -> List[str]:
+    # Messages for every pixmap of the current round that failed to load
+    problems = []
+    map_pixmap = window.clickable_map.original_pixmap
+    if map_pixmap is None or map_pixmap.isNull():
+        problems.append("map pixmap is null (is assets/nmh_map.png missing?)")
+    photo = window.photo_label.pixmap()
+    if photo is None or photo.isNull():
+        image_data = window.current_image_data or {}
+        problems.append(f"photo pixmap is null for {image_data.get('impath')}")
+    return problems
+
+
+def play_game(window, app, rng: random.Random) -> List[str]:
+    window.start_game(rng.choice(["easy", "hard"]))
+    problems: List[str] = []
+    while not window.is_game_complete():
+        flush_events(app)
+        problems.extend(check_pixmaps(window))
+        window.on_map_clicked(rng.randint(0, 1200), rng.randint(0, 900))
+    window.show_difficulty_selection()
+    return problems
+
+
+def flush_events(app) -> None:
+    from PySide6.QtCore import QCoreApplication, QEvent
+    app.processEvents()
+    # Replaced central widgets are deleted later; make sure that happens
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ))
+
+
+def print_growth(snapshot, previous, top: int) -> None:
+    for stat in snapshot.compare_to(previous, "lineno")[:top]:
+        if stat.size_diff:
+            print(f"  {stat}")
+
+
+def run_soak(games: int, warmup: int, interval: int, top: int, interval_top: int,
+             seed: int) -> Tuple[float, float, int]:
+    """
+    Play `games` games and print memory samples.
+
+    Returns:
+        (rss_per_game, traced_per_game, missing_pixmaps) where the growth is
+        in bytes, measured after warm-up.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ.pop("NMH_SCORE_LOG", None)
+    workdir = prepare_workdir()
+    os.chdir(workdir)
+
+    from PySide6.QtCore import qInstallMessageHandler
+    from PySide6.QtWidgets import QApplication
+    from gui import MainWindow
+
+    # The offscreen plugin warns on every window relayout; keep the report readable
+    qInstallMessageHandler(
+        lambda mode, context, message: None
+        if "propagateSizeHints" in message
+        else sys.stderr.write(message + "\n")
+    )
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = MainWindow()
+    window.resize(1280, 800)
+    window.show()
+    rng = random.Random(seed)
+
+    tracemalloc.start(10)
+    baseline = previous = None
+    rss_start = traced_start = 0
+    missing_pixmaps = 0
+    reported = set()
+    try:
+        with open(os.devnull, "w") as devnull:
+            for game_num in range(1, games + 1):
+                with redirect_stdout(devnull):
+                    problems = play_game(window, app, rng)
+                flush_events(app)
+
+                missing_pixmaps += len(problems)
+                for problem in problems:
+                    if problem not in reported:
+                        reported.add(problem)
+                        print(f"WARNING (game {game_num}): {problem}", file=sys.stderr)
+
+                if game_num == warmup:
+                    baseline = previous = take_snapshot()
+                    rss_start = current_rss()
+                    traced_start = tracemalloc.get_traced_memory()[0]
+                if game_num % interval == 0 or game_num == games:
+                    sample = {
+                        "game": game_num,
+                        "rss_mb": round(current_rss() / 2**20, 2),
+                        "traced_mb": round(tracemalloc.get_traced_memory()[0] / 2**20, 2),
+                    }
+                    print(json.dumps(sample))
+                    if previous is not None and game_num > warmup:
+                        snapshot = take_snapshot()
+                        print_growth(snapshot, previous, interval_top)
+                        previous = snapshot
+
+        measured = games - warmup
+        if baseline is None or measured <= 0:
+            return 0.0, 0.0, missing_pixmaps
+
+        print(f"\nTop {top} allocation sites by growth since game {warmup}:")
+        print_growth(take_snapshot(), baseline, top)
+
+        rss_per_game = (current_rss() - rss_start) / measured
+        traced_per_game = (tracemalloc.get_traced_memory()[0] - traced_start) / measured
+        return rss_per_game, traced_per_game, missing_pixmaps
+    finally:
+        tracemalloc.stop()
+        window.close()
+        os.chdir(project_root)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play scripted games offscreen and check memory growth")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50, help="games played before measuring")
+    parser.add_argument("--interval", type=int, default=100, help="games between samples")
+    parser.add_argument("--budget-kb", type=float, default=64.0, help="allowed growth per game")
+    parser.add_argument("--top", type=int, default=15,
+                        help="allocation sites to report for the whole run")
+    parser.add_argument("--interval-top", type=int, default=5,
+                        help="allocation sites to report at each sample")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--allow-missing-assets", action="store_true",
+                        help="only warn when the map or a photo fails to load")
+    args = parser.parse_args()
+    if args.warmup < 1:
+        parser.error("--warmup must be at least 1")
+    # The last game is always sampled, so this also guarantees a sample after warm-up
+    if args.games <= args.warmup:
+        parser.error(f"--games ({args.games}) must be greater than --warmup ({args.warmup}); "
+                     "nothing would be measured")
+
+    rss_per_game, traced_per_game, missing_pixmaps = run_soak(
+        args.games, args.warmup, max(1, args.interval), args.top, args.interval_top, args.seed
+    )
+    budget = args.budget_kb * 1024
+    print(f"\nRSS growth per game: {rss_per_game / 1024:.1f} KiB")
+    print(f"Python heap growth per game: {traced_per_game / 1024:.1f} KiB")
+    print(f"Budget: {args.budget_kb:.1f} KiB per game")
+
+    failed = False
+    if max(rss_per_game, traced_per_game) > budget:
+        print("FAIL: memory per game exceeds budget")
+        failed = True
+    if missing_pixmaps:
+        print(f"{missing_pixmaps} rounds ran without the map or photo pixmap")
+        if not args.allow_missing_assets:
+            print("FAIL: the soak did not exercise the real image allocations")
+            failed = True
+    if failed:
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    main()
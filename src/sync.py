@@ -0,0 +1,301 @@
+"""Sync.py
+
+This module merges the score logs of several kiosks into one global
+leaderboard.
+
+Every kiosk appends its final scores to an append-only JSON-lines log
+(SCORE_LOG_PATH in `utils.py`, one entry per line, each with a unique "id").
+Syncing reads each source log from its saved byte offset (the per-source
+high-water mark), appends the entries it has not seen before to the global
+log and then stores the new offsets. Each sync therefore only transfers and
+parses records written since the last one.
+
+Every merged id is kept in a sqlite index (SYNC_STATE_PATH) next to the source
+offsets and the global log's length, all committed in one transaction. An
+entry is never merged twice, even if the same log shows up again under another
+source name or is replaced by a longer copy. If a sync crashes after appending
+to the global log but before committing, the uncommitted tail is cut off on
+the next start and merged again.
+
+The merged log is read incrementally by `game.py`, so the end-screen
+leaderboard and rank include games from every kiosk. Each kiosk
+seeds its log once from its existing userdata.json (`seed_score_log`).
+
+Sources
+- Shared directory: every kiosk writes its log into one shared folder (set
+    NMH_SCORE_LOG to e.g. /mnt/shared/kiosk-3.jsonl). The file name without
+    extension is used as the source name.
+- Loopback service: a kiosk runs `serve_score_log` and the syncing machine
+    pulls new bytes with `LeaderboardSync.sync_url`.
+
+Running
+
+        python src/sync.py --dir /mnt/shared
+        python src/sync.py --serve 8765
+        python src/sync.py --url kiosk-3=http://127.0.0.1:8765
+
+"""
+
+import os
+import json
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import sqlite3
+from typing import Dict, Iterator, List, Tuple
+from urllib.error import HTTPError
+from urllib.parse import urlparse, parse_qs
+from urllib.request import urlopen
+
+from utils import DATA_DIR, GLOBAL_SCORES_PATH, SCORE_LOG_PATH
+
+
+GLOBAL_LOG_PATH = GLOBAL_SCORES_PATH
+SYNC_STATE_PATH = os.path.join(DATA_DIR, "sync_state.sqlite")
+# Largest chunk read from one source per request
+MAX_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def read_log_chunk(path: str, offset: int, limit: int = MAX_CHUNK_BYTES) -> Tuple[bytes, int]:
+    """
+    Read up to `limit` bytes of a log starting at `offset`.
+
+    Returns:
+        (data, size) where size is the current length of the file. If the
+        file is shorter than `offset` it was replaced, and nothing is read.
+    """
+    if not os.path.exists(path):
+        return b"", 0
+    size = os.path.getsize(path)
+    if offset >= size:
+        return b"", size
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(limit), size
+
+
+class LeaderboardSync:
+    def __init__(self, global_path: str = GLOBAL_LOG_PATH, state_path: str = SYNC_STATE_PATH):
+        self.global_path = global_path
+        self.state_path = state_path
+        os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+        # Merged ids, source offsets and the global log's length live in one
+        # sqlite file so they are always committed together
+        self._db = sqlite3.connect(state_path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS merged_ids (id TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS offsets (source TEXT PRIMARY KEY, offset INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        """)
+        self.offsets: Dict[str, int] = dict(self._db.execute("SELECT source, offset FROM offsets"))
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'global_length'").fetchone()
+        self.global_length = row[0] if row else None
+        self._check_global_log()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _check_global_log(self) -> None:
+        size = os.path.getsize(self.global_path) if os.path.exists(self.global_path) else 0
+        if self.global_length is None or size < self.global_length:
+            # New state, or the global log was replaced: index whatever it
+            # holds and merge every source again from the start
+            with self._db:
+                self._db.execute("DELETE FROM merged_ids")
+                self._db.execute("DELETE FROM offsets")
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO merged_ids (id) VALUES (?)",
+                    ((entry_id,) for entry_id in self._read_ids()),
+                )
+                self._set_global_length(size)
+            self.offsets = {}
+        elif size > self.global_length:
+            # Lines appended by a sync that crashed before committing; their
+            # sources are read again from the committed offsets
+            with open(self.global_path, "r+b") as f:
+                f.truncate(self.global_length)
+
+    def _set_global_length(self, length: int) -> None:
+        self.global_length = length
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('global_length', ?)", (length,)
+        )
+
+    def _read_ids(self) -> Iterator[str]:
+        if not os.path.exists(self.global_path):
+            return
+        with open(self.global_path, "rb") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)["id"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    def _reset_source(self, source: str) -> None:
+        # A source log was truncated or replaced and is read again from the
+        # start; merged_ids keeps its old entries out
+        self.offsets[source] = 0
+
+    def ingest(self, source: str, data: bytes, offset: int) -> int:
+        """
+        Merge the complete lines of `data` (read from `source` at `offset`)
+        and advance the source's high-water mark past them.
+
+        Returns:
+            Number of bytes consumed (a trailing partial line is left for
+            the next sync).
+        """
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return 0
+
+        with self._db:
+            new_lines: List[str] = []
+            line_offset = offset
+            for raw in data[:end].splitlines(keepends=True):
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    entry = None
+                if isinstance(entry, dict):
+                    # Older lines without an id are identified by their position
+                    entry_id = entry.get("id") or f"{source}@{line_offset}"
+                    cursor = self._db.execute(
+                        "INSERT OR IGNORE INTO merged_ids (id) VALUES (?)", (entry_id,)
+                    )
+                    if cursor.rowcount == 1:
+                        entry["id"] = entry_id
+                        entry.setdefault("kiosk", source)
+                        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+                        new_lines.append(line + "\n")
+                line_offset += len(raw)
+
+            if new_lines:
+                os.makedirs(os.path.dirname(self.global_path) or ".", exist_ok=True)
+                encoded = "".join(new_lines).encode("utf-8")
+                with open(self.global_path, "ab") as f:
+                    f.write(encoded)
+                self._set_global_length(self.global_length + len(encoded))
+            self.offsets[source] = offset + end
+            self._db.execute(
+                "INSERT OR REPLACE INTO offsets (source, offset) VALUES (?, ?)",
+                (source, offset + end),
+            )
+        return end
+
+    def sync_file(self, source: str, path: str) -> int:
+        """Merge new records from one log file. Returns the number of bytes read"""
+        offset = self.offsets.get(source, 0)
+        consumed = 0
+        while True:
+            data, size = read_log_chunk(path, offset)
+            if size < offset:
+                # Log was truncated or replaced: start over, ids prevent duplicates
+                self._reset_source(source)
+                offset = 0
+                continue
+            step = self.ingest(source, data, offset)
+            if step == 0:
+                break
+            offset += step
+            consumed += step
+        return consumed
+
+    def sync_directory(self, shared_dir: str) -> int:
+        """Merge every *.jsonl log found in a shared directory"""
+        consumed = 0
+        for name in sorted(os.listdir(shared_dir)):
+            if not name.endswith(".jsonl"):
+                continue
+            path = os.path.join(shared_dir, name)
+            if os.path.abspath(path) == os.path.abspath(self.global_path):
+                continue
+            source = os.path.splitext(name)[0]
+            consumed += self.sync_file(source, path)
+        return consumed
+
+    def sync_url(self, source: str, base_url: str) -> int:
+        """Merge new records from a kiosk running `serve_score_log`"""
+        offset = self.offsets.get(source, 0)
+        consumed = 0
+        while True:
+            try:
+                with urlopen(f"{base_url.rstrip('/')}/log?offset={offset}", timeout=10) as resp:
+                    data = resp.read()
+            except HTTPError as e:
+                if e.code == 416 and offset > 0:
+                    # Remote log is shorter than our mark: start over
+                    self._reset_source(source)
+                    offset = 0
+                    continue
+                raise
+            step = self.ingest(source, data, offset)
+            if step == 0:
+                break
+            offset += step
+            consumed += step
+        return consumed
+
+
+class ScoreLogHandler(BaseHTTPRequestHandler):
+    # Serves this kiosk's score log from a byte offset: GET /log?offset=N
+    log_path = SCORE_LOG_PATH
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/log":
+            self.send_error(404)
+            return
+        try:
+            offset = int(parse_qs(url.query).get("offset", ["0"])[0])
+        except ValueError:
+            self.send_error(400)
+            return
+        if offset < 0:
+            self.send_error(400)
+            return
+        data, size = read_log_chunk(self.log_path, offset)
+        if offset > size:
+            self.send_error(416)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_score_log(port: int, host: str = "127.0.0.1", log_path: str = SCORE_LOG_PATH) -> ThreadingHTTPServer:
+    handler = type("BoundScoreLogHandler", (ScoreLogHandler,), {"log_path": log_path})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Merge kiosk score logs into the global leaderboard")
+    parser.add_argument("--dir", help="shared directory containing <kiosk>.jsonl logs")
+    parser.add_argument("--url", action="append", default=[], metavar="NAME=URL",
+                        help="kiosk serving its log, may be repeated")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="serve this kiosk's log on localhost")
+    args = parser.parse_args()
+
+    if args.serve:
+        server = serve_score_log(args.serve)
+        print(f"Serving {SCORE_LOG_PATH} on port {args.serve}")
+        server.serve_forever()
+        return
+
+    syncer = LeaderboardSync()
+    try:
+        if args.dir:
+            print(f"{args.dir}: {syncer.sync_directory(args.dir)} bytes merged")
+        for item in args.url:
+            source, _, base_url = item.partition("=")
+            print(f"{source}: {syncer.sync_url(source, base_url)} bytes merged")
+    finally:
+        syncer.close()
+
+
+if __name__ == "__main__":
+    main()
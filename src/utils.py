@@ -8,12 +8,21 @@ Constants
 - IMAGES_DIR: directory where image files are stored ("data/images/")
 - METADATA_PATH: JSON file path storing image metadata ("data/metadata.json")
 - NMH_MAP_PATH: bundled map image used by the clickable map widget
+- SCORE_LOG_PATH: append-only JSON-lines log of this kiosk's final scores
+    ("data/score_log.jsonl", or the NMH_SCORE_LOG env var)
+- GLOBAL_SCORES_PATH: leaderboard merged from all kiosks by `src/sync.py`
+    ("data/global_scores.jsonl")
+- KIOSK_ID: name of this kiosk (NMH_KIOSK_ID env var, else the hostname)
 
 Functions
 - load_metadata() / save_metadata(data): read/write the metadata JSON.
 - is_within_bbox(lat, lon, bbox): check whether a coordinate is inside a
     bounding box (min_lat, min_lon, max_lat, max_lon).
 - pixel_distance(p1, p2): Distance between two pixel coordinates.
+- new_entry_id(): unique id for a score entry.
+- append_score_log(entry): append one score entry to SCORE_LOG_PATH.
+- seed_score_log(): one-time copy of userdata.json into SCORE_LOG_PATH.
+- read_global_user_data(offset): merged scores written after a byte offset.
 
 Metadata format (expected)
 The metadata file is a JSON object with an "items" list. Each entry is a
@@ -29,6 +38,8 @@ dictionary describing an image and may contain fields like:
 
 import os
 import json
+import uuid
+import socket
 from typing import Tuple, List
 
 
@@ -37,6 +48,9 @@ IMAGES_DIR = os.path.join(DATA_DIR, "images")
 METADATA_PATH = os.path.join(DATA_DIR, "imagedata.json")
 NMH_MAP_PATH = os.path.join("assets", "nmh_map.png")
 USER_DATA_PATH = os.path.join(DATA_DIR, "userdata.json")
+SCORE_LOG_PATH = os.environ.get("NMH_SCORE_LOG") or os.path.join(DATA_DIR, "score_log.jsonl")
+GLOBAL_SCORES_PATH = os.path.join(DATA_DIR, "global_scores.jsonl")
+KIOSK_ID = os.environ.get("NMH_KIOSK_ID") or socket.gethostname() or "kiosk"
 
 
 def ensure_data_dirs_exist() -> None:
@@ -78,7 +92,7 @@ def load_user_data() -> dict:
 def append_user_data(entry: dict) -> None:
     """
     Append a score entry to userdata.json, migrating from object to list if needed.
-    Entry format: {"player": str, "score": int, "difficulty": str}
+    Entry format: {"id": str, "kiosk": str, "player": str, "score": int, "difficulty": str}
     """
     data: List[dict] = []
     if os.path.exists(USER_DATA_PATH):
@@ -109,3 +123,70 @@ def load_all_user_data() -> List[dict]:
         return []
 
 
+def append_score_log(entry: dict, path: str = SCORE_LOG_PATH) -> None:
+    """
+    Append a score entry as one JSON line. The log is only ever appended to,
+    so the sync component can read new records from a saved byte offset.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def new_entry_id() -> str:
+    return f"{KIOSK_ID}-{uuid.uuid4().hex}"
+
+
+def seed_score_log(path: str = SCORE_LOG_PATH) -> None:
+    """
+    Copy the existing userdata.json history into a new score log so it can
+    be synced too. Entries get an id first, which is written back to
+    userdata.json so local and merged copies of a game are recognised as the
+    same entry. Does nothing once the log exists.
+    """
+    if os.path.exists(path):
+        return
+    entries = load_all_user_data()
+    changed = False
+    for entry in entries:
+        if not entry.get("id"):
+            entry["id"] = new_entry_id()
+            entry.setdefault("kiosk", KIOSK_ID)
+            changed = True
+    if changed:
+        save_user_data(entries)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def read_global_user_data(offset: int = 0, path: str = GLOBAL_SCORES_PATH) -> Tuple[List[dict], int]:
+    """
+    Read the merged entries written after byte `offset`.
+
+    Returns:
+        (entries, new_offset). Only complete lines are read, so a line that
+        is still being written is picked up by the next call.
+    """
+    entries: List[dict] = []
+    if not os.path.exists(path):
+        return entries, 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    for line in data[:end].splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(entry, dict):
+            entries.append(entry)
+    return entries, offset + end
+
+
+def global_user_data_size(path: str = GLOBAL_SCORES_PATH) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+